@@ -1,22 +1,24 @@
 
-from dash import Dash, dcc, html, Input, Output, callback, State, ctx, page_container
-import plotly.graph_objs as go
-import plotly.express as px
-import dash_bootstrap_components as dbc
-from path_creator import Vertex, PathCreator
-import json
-import pandas as pd
+from dash import Dash, dcc, html, page_container
 
 external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css']
 
-app = Dash(__name__, external_stylesheets=external_stylesheets, use_pages=True)
+def create_app():
+    """
+    Creates the app and registers the pages. Heavy imports (pandas, plotly) are deferred
+    to the callbacks that need them, and page layouts are built when first requested.
 
-app.layout=html.Div([
-    # Used to store the clubs and carry distances
-    dcc.Store(id='clubs-data', storage_type='session'),
-    page_container
-])
+    Returns:
+        The Dash app.
+    """
+    app = Dash(__name__, external_stylesheets=external_stylesheets, use_pages=True)
 
-if __name__ == '__main__':
-    app.run(debug=True)
+    app.layout=html.Div([
+        # Used to store the clubs and carry distances
+        dcc.Store(id='clubs-data', storage_type='session'),
+        page_container
+    ])
+    return app
 
+if __name__ == '__main__':
+    create_app().run(debug=True)
@@ -0,0 +1,91 @@
+"""
+Compares the size of the full shot graph on a few benchmark holes, along with the optimal path cost,
+as club selection is added step by step. The clubs after one with 3 shots from a vertex are skipped
+in every step (see PathCreator.skip_clubs), so the pruned graph has the same optimal path as the sorted one:
+    table order: the bag in the order of the clubs table, no pruning.
+    sorted: the bag sorted longest first (select_clubs), no pruning.
+    pruned: sorted, and clubs that can't improve the path from a vertex are skipped (get_useful_clubs).
+    selected: pruned, and clubs within the 5 yard shot spacing of a longer club are dropped (lossy).
+
+Usage:
+    python benchmarks/edge_counts.py [--processes N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from path_creator import PathCreator, Vertex, select_clubs
+
+# Bags as they might come from the clubs table: unsorted, with clubs close together
+BAGS = {
+    'short game': {'PW': '40', 'GW': '30', '9i': '45', 'SW': '20', 'LW': '18'},
+    'irons': {'7i': '35', '5i': '45', '9i': '25', '6i': '42', '8i': '30'},
+}
+
+# (name, course width, course length, number of hazards, bag)
+HOLES = [
+    ('narrow', 80, 40, 400, 'short game'),
+    ('open', 80, 60, 150, 'short game'),
+    ('trees', 90, 60, 900, 'irons'),
+]
+
+def make_hole(course_width, course_length, num_hazards, clubs, seed=0):
+    """
+    Returns a PathCreator for a benchmark hole with randomly placed hazards.
+
+    Args:
+        course_width (int): The width of the course.
+        course_length (int): The length of the course.
+        num_hazards (int): The number of hazards to place.
+        clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+        seed (int): The seed for placing the hazards.
+    """
+    rng = random.Random(seed)
+    start = (course_length//2, 2)
+    end = (course_length//2 + 5, course_width - 5)
+    hazards = {(rng.randrange(course_length), rng.randrange(course_width)) for _ in range(num_hazards)}
+    hazards -= {start, end}
+    return PathCreator(course_width, course_length, sorted(hazards), Vertex(*start), Vertex(*end),
+                       clubs, 'moderate', [], [], [])
+
+def measure(path_creator, processes):
+    """
+    Builds the full graph and finds the optimal path.
+
+    Returns:
+        number of vertices (int), number of edges (int), optimal cost (float), build time (float) in seconds
+    """
+    start = time.perf_counter()
+    path_creator.make_graph_parallel(path_creator.end, path_creator.clubs, processes)
+    build_time = time.perf_counter() - start
+    best = path_creator.run_k_best_search(1)
+    cost = best[0][2] if best else float('inf')
+    num_edges = sum(len(v.edges) for v in path_creator.vertices)
+    return len(path_creator.vertices), num_edges, cost, build_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=None, help='worker processes for building the graph')
+    args = parser.parse_args()
+
+    # (name, how the bag is prepared, whether clubs are pruned per vertex)
+    configs = [
+        ('table order', lambda bag: {club: float(dist) for club, dist in bag.items()}, False),
+        ('sorted', select_clubs, False),
+        ('pruned', select_clubs, True),
+        ('selected', lambda bag: select_clubs(bag, resolution=5), True),
+    ]
+    print('{:<8} {:<12} {:>10} {:>10} {:>8} {:>9}'.format('hole', 'clubs', 'vertices', 'edges', 'cost', 'time'))
+    for name, course_width, course_length, num_hazards, bag in HOLES:
+        for config, prepare, prune in configs:
+            path_creator = make_hole(course_width, course_length, num_hazards, prepare(BAGS[bag]))
+            path_creator.prune_clubs = prune
+            num_vertices, num_edges, cost, build_time = measure(path_creator, args.processes)
+            print('{:<8} {:<12} {:>10} {:>10} {:>8.4f} {:>8.2f}s'.format(
+                name, config, num_vertices, num_edges, cost, build_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures the startup time of the app using python -X importtime.
+
+Each run starts a fresh interpreter that imports app and creates the app (which imports the pages),
+then reports the median wall time and the slowest imports of the last run.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--top N] [--depth N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_CODE = 'import app; app.create_app()'
+
+def run_once():
+    """
+    Starts the app in a new interpreter with -X importtime.
+
+    Returns:
+        wall time (float) in seconds, imports (list of (module (str), cumulative time (int) in us, depth (int)))
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_CODE], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    wall_time = time.perf_counter() - start
+
+    imports = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:       123 |        456 |   package.module"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1)//2
+        imports.append((name.strip(), int(cumulative), depth))
+    return wall_time, imports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='number of startups to time')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest imports to list')
+    parser.add_argument('--depth', type=int, default=1, help='deepest level of nested imports to list')
+    args = parser.parse_args()
+
+    wall_times = []
+    for _ in range(args.runs):
+        wall_time, imports = run_once()
+        wall_times.append(wall_time)
+
+    print('Startup wall time: median {:.3f} s, min {:.3f} s over {} runs'.format(
+        statistics.median(wall_times), min(wall_times), args.runs))
+    print('Total import time: {:.3f} s'.format(sum(us for _, us, depth in imports if depth == 0)/1e6))
+    print('Slowest imports (last run, cumulative):')
+    slowest = sorted((entry for entry in imports if entry[2] <= args.depth), key=lambda entry: entry[1], reverse=True)
+    for name, us, depth in slowest[:args.top]:
+        print('  {:>8.1f} ms  {}{}'.format(us/1000, '  '*depth, name))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures how the anytime search scales with worker processes (see PathCreator.run_anytime_search).
+
+Each hole is searched to the optimal path (weight 1) in this process and then with each number of worker
+processes, reporting the search time, the optimal cost (which should be the same for every row) and the
+number of vertices generated (a batch can expand vertices that a one at a time search wouldn't).
+The coarse-to-fine search of a large hole is timed as well, as it shares one pool between its corridors.
+
+Usage:
+    python benchmarks/parallel_search.py [--processes N [N ...]] [--batch-size N]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from path_creator import PathCreator, Vertex
+
+CLUBS = {'D': 250, '5i': 180, '7i': 150, '9i': 120, 'PW': 100, 'SW': 80}
+SEARCH_TIME_BUDGET = 600 # Seconds, long enough for the search to prove the path optimal
+HIERARCHICAL_TIME_BUDGET = 4 # Seconds for the coarse-to-fine search, as on the page
+
+# (name, course width, course length, hazards per square yard)
+HOLES = [
+    ('long', 600, 300, 1/25),
+    ('dense', 500, 250, 1/10),
+]
+LARGE_HOLE = ('large', 1000, 1000, 1/25)
+
+def make_hole(course_width, course_length, hazard_density, seed=0):
+    """
+    Returns a PathCreator for a benchmark hole with randomly placed hazards.
+
+    Args:
+        course_width (int): The width of the course.
+        course_length (int): The length of the course.
+        hazard_density (float): The number of hazards per square yard.
+        seed (int): The seed for placing the hazards.
+    """
+    rng = random.Random(seed)
+    start = (course_length//2, 5)
+    end = (course_length//2 + 10, course_width - 10)
+    num_hazards = int(course_width*course_length*hazard_density)
+    hazards = {(rng.randrange(course_length), rng.randrange(course_width)) for _ in range(num_hazards)}
+    hazards -= {start, end}
+    return PathCreator(course_width, course_length, sorted(hazards), Vertex(*start), Vertex(*end),
+                       CLUBS, 'moderate', [], [], [])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4], help='numbers of worker processes to compare')
+    parser.add_argument('--batch-size', type=int, default=None, help='vertices expanded at a time (defaults to 4 per process)')
+    args = parser.parse_args()
+
+    print('{:<8} {:<10} {:>9} {:>8} {:>8} {:>10}'.format('hole', 'processes', 'time', 'cost', 'bound', 'vertices'))
+    for name, course_width, course_length, hazard_density in HOLES:
+        for processes in [None] + args.processes:
+            path_creator = make_hole(course_width, course_length, hazard_density)
+            start = time.perf_counter()
+            result = path_creator.run_anytime_search(SEARCH_TIME_BUDGET, weight=1, processes=processes, batch_size=args.batch_size)
+            search_time = time.perf_counter() - start
+            print('{:<8} {:<10} {:>8.2f}s {:>8.4f} {:>8.3f} {:>10}'.format(
+                name, processes or 'serial', search_time, path_creator.end.g_score, result[2], len(path_creator.vertices)))
+
+    name, course_width, course_length, hazard_density = LARGE_HOLE
+    for processes in [None] + args.processes:
+        path_creator = make_hole(course_width, course_length, hazard_density)
+        start = time.perf_counter()
+        result = path_creator.run_hierarchical_search(HIERARCHICAL_TIME_BUDGET, processes=processes, batch_size=args.batch_size)
+        search_time = time.perf_counter() - start
+        print('{:<8} {:<10} {:>8.2f}s {:>8.4f} {:>8.3f} {:>10}'.format(
+            name, processes or 'serial', search_time, path_creator.end.g_score, result[2], len(path_creator.vertices)))
+
+if __name__ == '__main__':
+    main()
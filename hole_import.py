@@ -0,0 +1,80 @@
+import base64
+import io
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageColor
+
+MAX_HOLE_YARDS = 1000 # Largest course length or width that can be built
+
+def image_to_hole(contents, pixels_per_yard, palette, tile_rows=128):
+    """
+    Converts an image of a hole map into a hole, with one point per yard. Images larger than
+    MAX_HOLE_YARDS at this scale are cropped to their top left MAX_HOLE_YARDS.
+
+    The image is downsampled to the yard grid and each cell is given the feature whose palette colour
+    is closest to the cell's average colour. The image itself is decoded whole (JPEG images at a reduced
+    scale, as long as it stays above the yard grid), but the grid is classified tile_rows rows at a time,
+    so the classification only needs memory for one tile rather than for the whole image.
+
+    Args:
+        contents (str): The image as a base64 data URL (as given by dcc.Upload).
+        pixels_per_yard (float): The scale of the image.
+        palette (dict of {obj (str): colour (str)}): The features and their colours (transparent colours are skipped).
+        tile_rows (int): The number of rows of the grid to classify at a time.
+
+    Returns:
+        df (Dataframe) with the x, y and obj of each point, course length (int), course width (int),
+        whether the image was cropped (bool)
+
+    Raises:
+        PIL.UnidentifiedImageError: If the contents are not an image.
+        PIL.Image.DecompressionBombError: If the image has too many pixels to be decoded safely.
+        ValueError: If the image is smaller than one yard at this scale.
+    """
+    _, data = contents.split(',', 1)
+    image = Image.open(io.BytesIO(base64.b64decode(data)))
+    full_width, full_height = image.size
+    cl = int(full_width/pixels_per_yard)
+    cw = int(full_height/pixels_per_yard)
+    if cl == 0 or cw == 0:
+        raise ValueError('The image is smaller than one yard at this scale')
+
+    # Let the decoder downscale (JPEG only) as long as it stays above the yard grid
+    image.draft('RGB', (cl, cw))
+    x_pixels_per_yard = pixels_per_yard*image.width/full_width
+    y_pixels_per_yard = pixels_per_yard*image.height/full_height
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    cropped = cl > MAX_HOLE_YARDS or cw > MAX_HOLE_YARDS
+    cl = min(cl, MAX_HOLE_YARDS)
+    cw = min(cw, MAX_HOLE_YARDS)
+
+    names = []
+    colours = []
+    for obj, colour in palette.items():
+        rgb = ImageColor.getrgb(colour)
+        if len(rgb) == 4 and rgb[3] == 0: # Transparent, can't be seen in the image
+            continue
+        names.append(obj)
+        colours.append(rgb[:3])
+    colours = np.array(colours, dtype=np.int32)
+
+    codes = np.empty((cw, cl), dtype=np.intp)
+    for top in range(0, cw, tile_rows):
+        rows = min(tile_rows, cw - top)
+        # Average the pixels of each cell in the tile
+        tile = image.resize((cl, rows), Image.Resampling.BOX,
+                            box=(0, top*y_pixels_per_yard, cl*x_pixels_per_yard, (top+rows)*y_pixels_per_yard))
+        pixels = np.asarray(tile, dtype=np.int32).reshape(-1, 1, 3)
+        distances = ((pixels - colours)**2).sum(axis=2)
+        codes[top:top+rows] = distances.argmin(axis=1).reshape(rows, cl)
+
+    # The top row of the image is the largest y value on the hole map
+    obj = np.array(names)[codes[::-1].ravel()]
+    df = pd.DataFrame({
+        "x": np.tile(np.arange(cl), cw),
+        "y": np.repeat(np.arange(cw), cl),
+        "obj": obj
+    })
+    return df, cl, cw, cropped
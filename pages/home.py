@@ -1,11 +1,10 @@
 
-from dash import Dash, dcc, html, Input, Output, callback, State, ctx, page_container, register_page, get_asset_url
-import plotly.graph_objs as go
-import plotly.express as px
+from math import isclose
+import time
+from dash import dcc, html, Input, Output, callback, State, register_page, get_asset_url, no_update
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-from path_creator import Vertex, PathCreator
-import json
-import pandas as pd
+from path_creator import Vertex, PathCreator, select_clubs
 
 register_page(__name__, path='/')
 
@@ -13,6 +12,14 @@ df = None # Dataframe for course
 cl = None # Course length
 cw = None # Course width
 
+PATH_TIME_BUDGET = 2.0 # Seconds the path search may run for, so the page always responds
+ALT_TIME_BUDGET = 0.5 # Seconds of PATH_TIME_BUDGET kept for finding the alternative paths
+LARGE_HOLE_AREA = 250000 # Holes larger than this (square yards) are planned coarse-to-fine
+PATH_PROCESSES = None # Worker processes that expand the path search in batches (None to search in the page's process)
+NUM_ALTERNATIVES = 2 # Number of alternative paths shown alongside the best path
+ALT_MAX_OVERLAP = 0.5 # Fraction of landing points an alternative may share with another shown path
+ALT_OVERLAP_RADIUS = 10 # Yards between two landing points for them to be shared
+
 obj_map = {
     'None': 'rgba(0, 0, 0, 0)',
     'Tee': 'rgba(0, 0, 0, 0)',
@@ -25,111 +32,123 @@ obj_map = {
     'Other Obstacle':'Grey'
 }
 
-layout = html.Div([
-    dbc.Row([
-        dbc.Col([html.H1("PickMyClub")]),
-        dbc.Col([dcc.Link(html.Img(src=get_asset_url('golf_bag.png'), style={'height': '65px', 'width': '65px'}), href='/bag')], style={
-        'position': 'absolute',
-        'top': 0,
-        'right': 0,
-        'margin': '10px'
-        })
-    ]),
-    html.Hr(style={'margin-top': '1px', 'margin-bottom': '5px'}),
-    html.P('''Welcome to PickMyClub! This program allows you to build golf holes and vizualize the optimal path from the tee to the pin based on
-        your yardages. Start by clicking on the bag icon in the top right to enter your available clubs and respective carry distances. Then, come back here to enter
-           the course length and width to proceed with building the course.'''),
-    dcc.Input(id='course-length', type='number', placeholder='Course length (yards)', min=0, max=1000),
-    dcc.Input(id='course-width', type='number', placeholder='Course width (yards)', min=0, max=1000),
-    html.Button('Generate Hole Map', id='start_button', n_clicks=0),
-    html.Div(className='row', children=[
-        html.Div(children=[
-                dbc.Col([
-                    dbc.Row(html.B("Select wind intensity"), style={'margin-top':'50px'}),
-                    dbc.Row(dcc.Dropdown(options=['None', 'Moderate', 'High'], value='None', id='wind-sel', clearable=False), style={"margin-bottom": "50px"}),
-                    dbc.Row([html.B("Construct hole"), html.Abbr("\uFE56", 
-                                                                         title="To place hole features, select them below, then place them on the hole map "+
-                                                                        "by right-clicking in the desired location. To place a cluster of items (a water hazard, large area of rough, bunker, etc.), "+
-                                                                        "you may select a feature below then use the 'Box Select' functionality in the top right of the hole map to place the cluster."
-                                                                        , style={'padding-left': 5})]),
-                    dbc.Row(dcc.RadioItems(
-                        [
-                            {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('tee.png'), height=30),
-                                        html.Span("Tee", style={'font-size': 15, 'padding-left': 10}),
-                                    ],
-                                "value": "Tee",
-                            },
-                            {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('pin.png'), height=30),
-                                        html.Span("Pin", style={'font-size': 15, 'padding-left': 10}),
-                                    ], 
-                                "value": "Pin",
-                            },
-                            {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('lawngreen.png'), height=20, width=20),
-                                        html.Span("Fairway", style={'font-size': 15, 'padding-left': 10})
-                                    ],
-                                "value": "Fairway",
-                            },
-                                                        {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('darkgreen.png'),  height=20, width=20),
-                                        html.Span("Rough", style={'font-size': 15, 'padding-left': 10})
-                                    ],  
-                                "value": "Rough",
-                            },
-                                                        {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('olive.png'),  height=20, width=20),
-                                        html.Span("Tree", style={'font-size': 15, 'padding-left': 10})
-                                    ],
-                                "value": "Tree",
-                            },
-                                                        {
-                               "label":
-                                    [
-                                        html.Img(src=get_asset_url('darkkhaki.png'),  height=20, width=20),
-                                        html.Span("Bunker", style={'font-size': 15, 'padding-left': 10})
-                                    ],
-                                "value": "Bunker",
-                            },
-                                                        {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('steelblue.png'),  height=20, width=20),
-                                        html.Span("Water Hazard", style={'font-size': 15, 'padding-left': 10})
-                                    ],
-                                "value": "Water Hazard",
-                            },
-                                                        {
-                                "label":
-                                    [
-                                        html.Img(src=get_asset_url('grey.png'),  height=20, width=20),
-                                        html.Span("Other Obstacle", style={'font-size': 15, 'padding-left': 10})
-                                    ],
-                                "value": "Other Obstacle",
-                            },
-                        ],  id='obj-selection', value='Tee')),
-                    dbc.Row(html.Button('Reset Hole Features', id='reset_button', n_clicks=0), style={'margin-top':'20px'}),
-                    dbc.Row(html.Button('Generate Optimal Path', id='gen_button', n_clicks=0), style={'margin-top':'20px'})
-                ]),
-                dbc.Col(dcc.Graph(id='basic-interactions')),
-                dbc.Col(html.Div(id='path-clubs', style={'margin-top':'50px'}))
-            ],
-            id = 'graph-div',
-            hidden=True
-        )
-    ]),
-])
+alt_colours = ['Crimson', 'DarkOrange'] # Colours of the alternative paths
+
+def layout(**kwargs):
+    """
+    Builds the layout of the home page when it is requested.
+
+    Args:
+        kwargs (dict): The query parameters of the url (unused).
+    """
+    return html.Div([
+        dbc.Row([
+            dbc.Col([html.H1("PickMyClub")]),
+            dbc.Col([dcc.Link(html.Img(src=get_asset_url('golf_bag.png'), style={'height': '65px', 'width': '65px'}), href='/bag')], style={
+            'position': 'absolute',
+            'top': 0,
+            'right': 0,
+            'margin': '10px'
+            })
+        ]),
+        html.Hr(style={'margin-top': '1px', 'margin-bottom': '5px'}),
+        html.P('''Welcome to PickMyClub! This program allows you to build golf holes and vizualize the optimal path from the tee to the pin based on
+            your yardages. Start by clicking on the bag icon in the top right to enter your available clubs and respective carry distances. Then, come back here to enter
+               the course length and width to proceed with building the course, or upload an image of the hole map with its scale.'''),
+        dcc.Input(id='course-length', type='number', placeholder='Course length (yards)', min=0, max=1000),
+        dcc.Input(id='course-width', type='number', placeholder='Course width (yards)', min=0, max=1000),
+        html.Button('Generate Hole Map', id='start_button', n_clicks=0),
+        dcc.Input(id='image-scale', type='number', placeholder='Image scale (pixels per yard)', min=0),
+        dcc.Upload(html.Button('Upload Hole Map'), id='hole-upload', accept='image/*', style={'display': 'inline-block'}),
+        html.Div(id='upload-message'),
+        html.Div(className='row', children=[
+            html.Div(children=[
+                    dbc.Col([
+                        dbc.Row(html.B("Select wind intensity"), style={'margin-top':'50px'}),
+                        dbc.Row(dcc.Dropdown(options=['None', 'Moderate', 'High'], value='None', id='wind-sel', clearable=False), style={"margin-bottom": "50px"}),
+                        dbc.Row([html.B("Construct hole"), html.Abbr("\uFE56", 
+                                                                             title="To place hole features, select them below, then place them on the hole map "+
+                                                                            "by right-clicking in the desired location. To place a cluster of items (a water hazard, large area of rough, bunker, etc.), "+
+                                                                            "you may select a feature below then use the 'Box Select' functionality in the top right of the hole map to place the cluster."
+                                                                            , style={'padding-left': 5})]),
+                        dbc.Row(dcc.RadioItems(
+                            [
+                                {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('tee.png'), height=30),
+                                            html.Span("Tee", style={'font-size': 15, 'padding-left': 10}),
+                                        ],
+                                    "value": "Tee",
+                                },
+                                {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('pin.png'), height=30),
+                                            html.Span("Pin", style={'font-size': 15, 'padding-left': 10}),
+                                        ], 
+                                    "value": "Pin",
+                                },
+                                {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('lawngreen.png'), height=20, width=20),
+                                            html.Span("Fairway", style={'font-size': 15, 'padding-left': 10})
+                                        ],
+                                    "value": "Fairway",
+                                },
+                                                            {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('darkgreen.png'),  height=20, width=20),
+                                            html.Span("Rough", style={'font-size': 15, 'padding-left': 10})
+                                        ],  
+                                    "value": "Rough",
+                                },
+                                                            {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('olive.png'),  height=20, width=20),
+                                            html.Span("Tree", style={'font-size': 15, 'padding-left': 10})
+                                        ],
+                                    "value": "Tree",
+                                },
+                                                            {
+                                   "label":
+                                        [
+                                            html.Img(src=get_asset_url('darkkhaki.png'),  height=20, width=20),
+                                            html.Span("Bunker", style={'font-size': 15, 'padding-left': 10})
+                                        ],
+                                    "value": "Bunker",
+                                },
+                                                            {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('steelblue.png'),  height=20, width=20),
+                                            html.Span("Water Hazard", style={'font-size': 15, 'padding-left': 10})
+                                        ],
+                                    "value": "Water Hazard",
+                                },
+                                                            {
+                                    "label":
+                                        [
+                                            html.Img(src=get_asset_url('grey.png'),  height=20, width=20),
+                                            html.Span("Other Obstacle", style={'font-size': 15, 'padding-left': 10})
+                                        ],
+                                    "value": "Other Obstacle",
+                                },
+                            ],  id='obj-selection', value='Tee')),
+                        dbc.Row(html.Button('Reset Hole Features', id='reset_button', n_clicks=0), style={'margin-top':'20px'}),
+                        dbc.Row(html.Button('Generate Optimal Path', id='gen_button', n_clicks=0), style={'margin-top':'20px'})
+                    ]),
+                    dbc.Col(dcc.Graph(id='basic-interactions')),
+                    dbc.Col(html.Div(id='path-clubs', style={'margin-top':'50px'}))
+                ],
+                id = 'graph-div',
+                hidden=True
+            )
+        ]),
+    ])
 
 @callback(
         Output('basic-interactions', 'figure', allow_duplicate=True),
@@ -170,6 +189,7 @@ def generate_initial_graph(n_clicks, new_cl, new_cw):
     Returns:
         The new figure, the style of the graph to make it visible.
     """
+    import pandas as pd
     global df
     global cl
     global cw
@@ -195,6 +215,52 @@ def generate_initial_graph(n_clicks, new_cl, new_cw):
     })
 
     return get_figure(df), {"display": "flex"}
+
+@callback(
+    Output('basic-interactions', 'figure', allow_duplicate=True),
+    Output('graph-div', 'style', allow_duplicate=True),
+    Output('upload-message', 'children'),
+    Output('hole-upload', 'contents'),
+    Input('hole-upload', 'contents'),
+    State('image-scale', 'value'),
+    prevent_initial_call=True
+)
+def upload_hole(contents, scale):
+    """
+    Generates the graph from an uploaded image of the hole map. The upload is cleared afterwards,
+    so the same image can be uploaded again (e.g. with a different scale).
+
+    Args:
+        contents (str): The uploaded image as a base64 data URL.
+        scale (float): The scale of the image in pixels per yard.
+
+    Returns:
+        The new figure, the style of the graph to make it visible, a message about the upload, the cleared upload.
+    """
+    from PIL import Image, UnidentifiedImageError
+    from hole_import import image_to_hole, MAX_HOLE_YARDS
+    global df
+    global cl
+    global cw
+
+    if contents is None:
+        raise PreventUpdate
+    if not scale or scale <= 0:
+        return no_update, no_update, html.B('Enter the image scale (pixels per yard) before uploading the hole map'), None
+    try:
+        new_df, new_cl, new_cw, cropped = image_to_hole(contents, float(scale), obj_map)
+    except UnidentifiedImageError:
+        return no_update, no_update, html.B('The uploaded file is not an image'), None
+    except Image.DecompressionBombError:
+        return no_update, no_update, html.B('The image has too many pixels to import, try a smaller image'), None
+    except ValueError as e:
+        return no_update, no_update, html.B(str(e)), None
+    df, cl, cw = new_df, new_cl, new_cw
+
+    message = None
+    if cropped:
+        message = html.B('The image is larger than {0} yards at this scale, so only its top left {0} yards were used'.format(MAX_HOLE_YARDS))
+    return get_figure(df), {"display": "flex"}, message, None
     
 @callback(
     Output('basic-interactions', 'figure', allow_duplicate=True),
@@ -288,7 +354,9 @@ def generate_path(n_clicks, data, wind_val):
     end = df.loc[df['obj'] == 'Pin']
     end = Vertex(end['x'].iloc[0], end['y'].iloc[0])
 
-    clubs = {row['club-column']: int(row['dist-column']) for row in data}
+    clubs = select_clubs({row['club-column']: row['dist-column'] for row in data or []})
+    if not clubs:
+        return get_figure(df), html.B('Add your clubs to the bag first')
     hazard_rows = df[df['obj'].isin(['Tree', 'Water Hazard', 'Other Obstacle'])]
     hazards = list(zip(hazard_rows['x'], hazard_rows['y']))
     wind=wind_val.lower()
@@ -301,19 +369,62 @@ def generate_path(n_clicks, data, wind_val):
 
     # Calculate optimal path.
     path_creator = PathCreator(cw, cl, hazards, start, end, clubs, wind, fairways, roughs, bunkers)
-    path_creator.make_graph(start, end, clubs)
-    path, path_clubs = path_creator.run_search()
+    coarse_to_fine = cl*cw > LARGE_HOLE_AREA
+    deadline = time.perf_counter() + PATH_TIME_BUDGET
+    search_budget = PATH_TIME_BUDGET - ALT_TIME_BUDGET
+    try:
+        if coarse_to_fine:
+            result = path_creator.run_hierarchical_search(search_budget, processes=PATH_PROCESSES)
+        else:
+            result = path_creator.run_anytime_search(search_budget, processes=PATH_PROCESSES)
+    except TimeoutError:
+        return get_figure(df), html.B('No path was found within {} seconds. The hole may still have a path, '.format(search_budget)+
+                                      'try simplifying the hole or adding clubs.')
+    if result is None:
+        return get_figure(df), html.B('There is no path from the tee to the pin with these clubs')
+    path, path_clubs, bound = result
+    cost = path_creator.end.g_score
+
+    # The k best paths are exact over the graph built by the search, so the first may improve on the path found
+    paths = path_creator.run_k_best_search(NUM_ALTERNATIVES+1, ALT_MAX_OVERLAP, ALT_OVERLAP_RADIUS,
+                                           time_budget=max(0, deadline - time.perf_counter()))
+    if paths and paths[0][2] < cost and not isclose(paths[0][2], cost):
+        path, path_clubs, best_cost = paths[0]
+        bound = max(1, bound*best_cost/cost)
+        cost = best_cost
     path_x = [v.x for v in path]
     path_y = [v.y for v in path]
-    fig = get_figure(df, path_x, path_y)
+
+    # Alternatives from the graph built by the search, that land away from the best path
+    alternatives = []
+    for alt_path, alt_clubs, alt_cost in paths:
+        if alt_path == path and alt_clubs == path_clubs: # The best path (alternatives of the same cost are kept)
+            continue
+        if path_creator.get_landing_overlap(alt_path[1:-1], path[1:-1], ALT_OVERLAP_RADIUS) <= ALT_MAX_OVERLAP and len(alternatives) < NUM_ALTERNATIVES:
+            alternatives.append(([v.x for v in alt_path], [v.y for v in alt_path], alt_clubs))
+    fig = get_figure(df, path_x, path_y, [(alt_x, alt_y) for alt_x, alt_y, _ in alternatives])
 
     shot_distances = calc_shot_distances(path_x, path_y)
     clubs_str = []
-    clubs_str.append(html.B('Optimal Path', style={'margin-bottom':'10px'}))
+    if coarse_to_fine:
+        # The bound only holds among the paths near the coarse plan
+        clubs_str.append(html.B('Path (planned coarse-to-fine, may not be optimal)', style={'margin-bottom':'10px'}))
+    elif bound > 1:
+        clubs_str.append(html.B('Path (within {:.1%} of optimal)'.format(bound-1), style={'margin-bottom':'10px'}))
+    else:
+        clubs_str.append(html.B('Optimal Path', style={'margin-bottom':'10px'}))
     for i in range(1, len(path_clubs)+1):
         clubs_str.append(html.Li("{}: {} yards".format(path_clubs[i-1], shot_distances[i-1])))
+    clubs_lists = [html.Ol(clubs_str)]
+
+    for n, (alt_x, alt_y, alt_clubs) in enumerate(alternatives, start=1):
+        shot_distances = calc_shot_distances(alt_x, alt_y)
+        clubs_str = [html.B('Alternative {}'.format(n), style={'margin-bottom':'10px', 'color':alt_colours[n-1]})]
+        for i in range(1, len(alt_clubs)+1):
+            clubs_str.append(html.Li("{}: {} yards".format(alt_clubs[i-1], shot_distances[i-1])))
+        clubs_lists.append(html.Ol(clubs_str))
 
-    return fig, html.Ol(clubs_str)
+    return fig, html.Div(clubs_lists)
 
 def calc_shot_distances(x_vals, y_vals):
     """
@@ -329,7 +440,7 @@ def calc_shot_distances(x_vals, y_vals):
         distances.append(int(dist))
     return distances
 
-def get_figure(df, path_x=None, path_y=None):
+def get_figure(df, path_x=None, path_y=None, alt_paths=None):
     """
     Generates a figure from the dataframe.
 
@@ -337,10 +448,13 @@ def get_figure(df, path_x=None, path_y=None):
         df (Dataframe): Contains the data of each point.
         path_x (list of float): The x values in the optimal path.
         path_y (list of float): The y values in the optimal path.
+        alt_paths (list of (x_vals (list of float), y_vals (list of float))): The alternative paths.
     
         Returns:
             The figure.
     """
+    import plotly.express as px
+    import plotly.graph_objs as go
     fig = px.scatter(df, x="x", y="y", custom_data=["x", "y"], color='obj',color_discrete_map=obj_map)
     fig.update_layout(clickmode='event+select')
     fig.update_traces(opacity=1)
@@ -397,6 +511,18 @@ def get_figure(df, path_x=None, path_y=None):
             )
         )
     
+    # Adds the alternative paths to the figure (if supplied), under the optimal path
+    for (alt_x, alt_y), colour in zip(alt_paths or [], alt_colours):
+        fig.add_trace(
+            go.Scattergl(
+                x=alt_x,
+                y=alt_y,
+                mode='lines+markers',
+                line=dict(color=colour, dash='dash'),
+                marker=dict(color=colour, size=10, symbol='square')
+            )
+        )
+
     # Adds the optimal path to the figure (if supplied)
     fig.add_trace(
         go.Scattergl(
@@ -0,0 +1,306 @@
+import os
+from array import array
+from math import floor, ceil
+import multiprocessing
+from multiprocessing import Pool, shared_memory
+from path_creator import PathCreator
+
+LIE_CODES = {'fairway':1, 'rough':2, 'bunker':3}
+
+class TerrainRaster:
+    """
+    Stores the hazards and lies of a hole as yard grid rasters in shared memory, so that worker
+    processes can read them without the terrain being pickled for every task. Cell (x,y) is at index x*ny + y.
+
+    Attributes:
+        nx (int): The number of columns (x values) in the rasters.
+        ny (int): The number of rows (y values) in the rasters.
+        lie (memoryview of int8): The lie code of each cell (see LIE_CODES, 0 if unset).
+        hazard_below (memoryview of int32): The y value of the closest hazard at or below each cell in its column (-1 if none).
+        hazard_above (memoryview of int32): The y value of the closest hazard at or above each cell in its column (-1 if none).
+        hazard_columns (list of int): The columns containing at least one hazard.
+    """
+    def __init__(self, nx, ny, blocks, owner):
+        self.nx = nx
+        self.ny = ny
+        self.blocks = blocks # Shared memory blocks for the lie, hazard_below and hazard_above rasters
+        self.owner = owner # Whether this process created (and must unlink) the blocks
+        self.lie = blocks[0].buf.cast('b')
+        self.hazard_below = blocks[1].buf.cast('i')
+        self.hazard_above = blocks[2].buf.cast('i')
+        self.hazard_columns = [x for x in range(nx) if self.hazard_below[x*ny + ny-1] >= 0]
+
+    @classmethod
+    def create(cls, path_creator):
+        """
+        Rasterizes the terrain of a PathCreator into new shared memory blocks.
+
+        Args:
+            path_creator (PathCreator): The PathCreator with hazards and lies on the yard grid.
+        """
+        nx = int(path_creator.course_length) + 2
+        ny = int(path_creator.course_width) + 2
+        blocks = [shared_memory.SharedMemory(create=True, size=nx*ny*size) for size in (1, 4, 4)]
+        blocks[0].buf[:nx*ny] = bytes(nx*ny)
+        blocks[1].buf[:nx*ny*4] = b'\xff'*(nx*ny*4) # -1 in every cell
+        blocks[2].buf[:nx*ny*4] = b'\xff'*(nx*ny*4)
+        lie = blocks[0].buf.cast('b')
+        below = blocks[1].buf.cast('i')
+        above = blocks[2].buf.cast('i')
+
+        # Bunker first so that fairway and rough take priority, as in get_lie
+        for name in ('bunker', 'rough', 'fairway'):
+            code = LIE_CODES[name]
+            for (x,y) in getattr(path_creator, name):
+                if 0 <= x < nx and 0 <= y < ny:
+                    lie[int(x)*ny + int(y)] = code
+        columns = {}
+        for (x,y) in path_creator.hazards:
+            if 0 <= x < nx and 0 <= y < ny:
+                columns.setdefault(int(x), set()).add(int(y))
+        # Fill in the closest hazard below and above each cell, one run between hazards at a time
+        for x, ys in columns.items():
+            col = x*ny
+            ys = sorted(ys)
+            for i, y in enumerate(ys):
+                next_y = ys[i+1] if i+1 < len(ys) else ny
+                below[col+y:col+next_y] = array('i', [y])*(next_y - y)
+                prev_y = ys[i-1] + 1 if i > 0 else 0
+                above[col+prev_y:col+y+1] = array('i', [y])*(y + 1 - prev_y)
+        # Release the views so the blocks can be closed later
+        lie.release()
+        below.release()
+        above.release()
+        return cls(nx, ny, blocks, owner=True)
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Attaches to rasters created in another process.
+
+        Args:
+            spec (tuple): The value returned by spec() in the creating process.
+        """
+        nx, ny, names = spec
+        return cls(nx, ny, [shared_memory.SharedMemory(name=name) for name in names], owner=False)
+
+    def spec(self):
+        """Returns the (picklable) information needed to attach to the rasters."""
+        return self.nx, self.ny, [block.name for block in self.blocks]
+
+    def close(self):
+        """Releases the rasters, removing the shared memory if this process created it."""
+        self.lie.release()
+        self.hazard_below.release()
+        self.hazard_above.release()
+        for block in self.blocks:
+            block.close()
+            if self.owner:
+                block.unlink()
+
+class RasterPathCreator(PathCreator):
+    """
+    A PathCreator that looks up hazards and lies in a TerrainRaster instead of scanning the point lists.
+    Gives the same results as PathCreator for terrain on the yard grid.
+
+    Attributes:
+        terrain (TerrainRaster): The rasterized terrain.
+    """
+    def __init__(self, course_width, course_length, terrain, start, end, clubs, wind):
+        super().__init__(course_width, course_length, [], start, end, clubs, wind, [], [], [])
+        self.terrain = terrain
+
+    def get_hazard_prox(self, x1, y1):
+        """
+        Returns the proximity of a point to a hazard.
+
+        Args:
+            x1 (float): The x value of the point.
+            y1 (float): The y value of the point.
+        """
+        terrain = self.terrain
+        ny = terrain.ny
+        # curr_min is initially out of bounds by width
+        curr_min = min(y1, self.course_width-y1)
+        y_low = min(max(floor(y1), 0), ny-1)
+        y_high = min(max(ceil(y1), 0), ny-1)
+        # Check columns moving away from the point until they are further than the closest hazard
+        left = floor(x1)
+        right = left + 1
+        while True:
+            left_open = left >= 0 and x1 - left < curr_min
+            right_open = right < terrain.nx and right - x1 < curr_min
+            if not left_open and not right_open:
+                return curr_min
+            for x, is_open in ((left, left_open), (right, right_open)):
+                if not is_open:
+                    continue
+                for y in (terrain.hazard_below[x*ny + y_low], terrain.hazard_above[x*ny + y_high]):
+                    if y >= 0:
+                        distance = ((x1 - x)**2 + (y1 - y)**2)**0.5
+                        if distance < curr_min:
+                            curr_min = distance
+            left -= 1
+            right += 1
+
+    def get_num_obs(self, x1, y1, x2, y2):
+        """
+        Returns the number of obstacles (hazards) within the path of the shot.
+
+        Args:
+            x1 (float): The x value of the starting point.
+            y1 (float): The y value of the starting point.
+            x2 (float): The x value of the endpoint.
+            y2 (float): The y value of the endpoint.
+        """
+        if x2 - x1 == 0: # The line has no finite intercept, so no hazard can be on it
+            return 0
+        terrain = self.terrain
+        ny = terrain.ny
+        slope = (y2-y1)/(x2-x1)
+        intercept = y1 - slope * x1
+        count = 0
+        for x in terrain.hazard_columns:
+            line_y = slope * x + intercept
+            for y in range(floor(line_y)-1, floor(line_y)+3):
+                if 0 <= y < ny and terrain.hazard_below[x*ny + y] == y and abs(y - line_y) <= 1:
+                    count+=1
+                    if count == 10:
+                        return count
+        return count
+
+    def get_lie(self, x, y):
+        """Returns the lie of the shot (within 1 yard)
+
+        Args:
+            x (float): The x value of the point.
+            y (float): The y value of the point.
+        """
+        terrain = self.terrain
+        codes = set()
+        for x1 in (floor(x), floor(x)+1):
+            for y1 in (floor(y), floor(y)+1):
+                if 0 <= x1 < terrain.nx and 0 <= y1 < terrain.ny and ((x - x1)**2 + (y - y1)**2)**0.5 < 1:
+                    codes.add(terrain.lie[x1*terrain.ny + y1])
+        for lie in ('fairway', 'rough', 'bunker'):
+            if LIE_CODES[lie] in codes:
+                return lie
+        return 'fairway'
+
+_terrain = None # The worker's TerrainRaster
+_creator = None # The worker's RasterPathCreator
+
+def _init_worker(spec, course_width, course_length, end, clubs, wind, spacing, prune_clubs, skip_clubs):
+    """
+    Attaches a worker process to the shared terrain and sets up its RasterPathCreator.
+    """
+    global _terrain, _creator
+    _terrain = TerrainRaster.attach(spec)
+    _creator = RasterPathCreator(course_width, course_length, _terrain, None, end, clubs, wind)
+    _creator.spacing = spacing
+    _creator.prune_clubs = prune_clubs
+    _creator.skip_clubs = skip_clubs
+
+def _expand_batch(points, partial, corridor, corridor_width):
+    """
+    Returns the next shots and the clubs left from each of a batch of points (see PathCreator.get_next_shots).
+
+    Args:
+        points (list of (x (float), y (float), clubs left (dict or None))): The points to expand.
+        partial (bool): Whether to only generate the shots of the next longest clubs.
+        corridor (list of (x (float),y (float))): The corridor new vertices must lie in (None for no corridor).
+        corridor_width (float): The half width of the corridor.
+    """
+    _creator.corridor = corridor
+    _creator.corridor_width = corridor_width
+    return [_creator.get_next_shots(x, y, _creator.end, _creator.clubs, clubs_left, partial) for (x, y, clubs_left) in points]
+
+class ParallelExpander:
+    """
+    Expands vertices of a PathCreator across a pool of worker processes that share its terrain,
+    merging the resulting shots into the graph in this process. The corridor of the PathCreator is sent
+    with every batch, so one expander can be reused by searches in different corridors (and after
+    reset_graph). Can be used as a context manager.
+
+    Attributes:
+        path_creator (PathCreator): The PathCreator whose vertices are expanded.
+        end (Vertex): The end vertex (pin).
+        processes (int): The number of worker processes.
+        terrain (TerrainRaster): The terrain shared with the workers.
+        pool (Pool): The worker processes.
+    """
+    def __init__(self, path_creator, end, clubs, processes=None):
+        self.path_creator = path_creator
+        self.end = end
+        self.processes = processes or os.cpu_count() or 1
+        self.terrain = TerrainRaster.create(path_creator)
+        try:
+            initargs = (self.terrain.spec(), path_creator.course_width, path_creator.course_length, end, clubs,
+                        path_creator.wind, path_creator.spacing, path_creator.prune_clubs, path_creator.skip_clubs)
+            self.pool = Pool(self.processes, initializer=_init_worker, initargs=initargs)
+        except BaseException:
+            self.terrain.close()
+            raise
+
+    def expand(self, vertices, batch_size=None, timeout=None, partial=False):
+        """
+        Expands the vertices that haven't been fully expanded yet (see PathCreator.expand_vertex).
+
+        Args:
+            vertices (list of Vertex): The vertices to expand.
+            batch_size (int): The number of vertices sent to a worker at a time (defaults to an even split across the workers).
+            timeout (float): The number of seconds to wait for the workers (None to wait until they finish).
+            partial (bool): Whether to only generate the shots of the next longest clubs of each vertex.
+
+        Raises:
+            TimeoutError: If the workers didn't finish within the timeout. None of the vertices are expanded.
+        """
+        vertices = [v for v in vertices if not v.expanded and v is not self.end]
+        if not vertices:
+            return
+        if batch_size is None:
+            batch_size = ceil(len(vertices)/self.processes)
+        batches = [vertices[i:i+batch_size] for i in range(0, len(vertices), batch_size)]
+        corridor = self.path_creator.corridor
+        corridor_width = self.path_creator.corridor_width
+        pending = self.pool.starmap_async(_expand_batch, [([(v.x, v.y, v.clubs_left) for v in batch], partial, corridor, corridor_width)
+                                                          for batch in batches])
+        try:
+            results = pending.get(timeout)
+        except multiprocessing.TimeoutError:
+            raise TimeoutError('The workers did not finish within {} seconds'.format(timeout)) from None
+        for batch, batch_shots in zip(batches, results):
+            for curr_v, (shots, clubs_left) in zip(batch, batch_shots):
+                self.path_creator.add_shots(curr_v, shots, self.end, clubs_left)
+
+    def close(self):
+        """Stops the workers and releases the shared terrain."""
+        self.pool.terminate()
+        self.pool.join()
+        self.terrain.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def make_graph_parallel(path_creator, end, clubs, processes=None, batch_size=64):
+    """
+    Constructs the graph of a PathCreator level by level, expanding the vertices of a level in
+    batches across worker processes (see ParallelExpander).
+
+    Args:
+        path_creator (PathCreator): The PathCreator whose graph is constructed.
+        end (Vertex): The end vertex (pin).
+        clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+        processes (int): The number of worker processes (defaults to the number of CPUs).
+        batch_size (int): The number of vertices sent to a worker at a time.
+    """
+    with ParallelExpander(path_creator, end, clubs, processes) as expander:
+        frontier = [v for v in path_creator.vertices if not v.expanded]
+        while frontier:
+            num_vertices = len(path_creator.vertices)
+            expander.expand(frontier, batch_size)
+            frontier = path_creator.vertices[num_vertices:]
+    path_creator.vertices.append(end)
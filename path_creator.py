@@ -1,5 +1,40 @@
 import heapq
-from math import sin, cos, pi
+import time
+from bisect import bisect_left
+from collections import Counter
+from math import sin, cos, pi, ceil, floor, isfinite
+
+def select_clubs(clubs, resolution=0):
+    """
+    Normalizes a bag of clubs for the search: clubs without a valid positive distance are dropped,
+    the clubs are sorted longest first and a club with the same carry as a longer one is dropped,
+    since its shots are the same. If resolution is given, a club is also dropped if its carry is within
+    resolution of a longer club. This is lossy, as its shots land elsewhere and may give a better path.
+
+    Args:
+        clubs (dict of {club (str):distance (str or float)}): Dictionary of club with their respective distances.
+        resolution (float): The difference in yards below which clubs are treated as the same (0 to keep every distinct carry).
+
+    Returns:
+        clubs (dict of {club (str):distance (float)}), longest first.
+    """
+    valid = []
+    for club, dist in clubs.items():
+        try:
+            dist = float(dist)
+        except (TypeError, ValueError):
+            continue
+        if isfinite(dist) and dist > 0:
+            valid.append((dist, club))
+    valid.sort(reverse=True)
+
+    selected = {}
+    last_dist = float('inf')
+    for dist, club in valid:
+        if dist < last_dist and last_dist - dist >= resolution:
+            selected[club] = dist
+            last_dist = dist
+    return selected
 
 class Vertex:
     """
@@ -11,7 +46,11 @@ class Vertex:
         prev (Vertex): The previous vertex in the path (if applicable).
         edges (list of Edge): The outgoing edges from this vertex.
         f_score (float): The cost to get to this vertex.
+        g_score (float): The best known cost from the start to this vertex (anytime search).
         club (str): The club used to get to this vertex in the path.
+        expanded (bool): Whether all of the outgoing edges of this vertex have been generated.
+        clubs_left (dict of {club (str):distance (float)}): The clubs whose shots from this vertex haven't been
+            generated yet (None if the vertex hasn't been expanded at all).
     """
 
     def __init__(self, x, y):
@@ -20,7 +59,10 @@ class Vertex:
         self.prev = None
         self.edges = []
         self.f_score = float('inf')
+        self.g_score = float('inf')
         self.club = None
+        self.expanded = False
+        self.clubs_left = None
 
     def __lt__(self, other):
         """Defines comparison criteria for vertices, here being f_score.
@@ -59,11 +101,22 @@ class PathCreator:
         fairway (list of (x (float),y (float))): Contains the (x,y) coordinates of the fairway.
         rough (list of (x (float),y (float))): Contains the (x,y) coordinates of the rough.
         bunker (list of (x (float),y (float))): Contains the (x,y) coordinates of the bunker.
+        spacing (float): The distance between neighbouring shots of the same club.
+        corridor (list of (x (float),y (float))): If set, new vertices must lie within corridor_width of this polyline.
+        corridor_width (float): The half width of the corridor.
+        prune_clubs (bool): Whether to skip clubs that can't improve the path from a vertex (see get_useful_clubs).
+        skip_clubs (bool): Whether to skip the clubs after the first one with at least 3 shots from a vertex, as in
+            the original search (this assumes the clubs are sorted longest first). If not, every club is tried.
     """
+    lie_weights = {'rough':0.7, 'fairway':0.1, 'bunker':0.95}
+    wind_weights = {'none':0.2, 'moderate':0.5, 'high':0.7}
+
     def __init__(self, course_width, course_length, hazards, start, end, clubs, wind, fairway, rough, bunker):
         self.course_width = course_width
         self.course_length = course_length
         self.hazards = hazards 
+        self.hazard_index = self.make_hazard_index(hazards)
+        self.hazard_columns = sorted(self.hazard_index)
         self.start = start
         self.end = end
         self.clubs = clubs
@@ -73,6 +126,11 @@ class PathCreator:
         self.bunker = bunker
         self.vertices = [start] # Stores the vertices in the graph
         self.edges = [] # Stores the edges in the graph
+        self.spacing = 5 # Shots are 5 yards apart
+        self.prune_clubs = True
+        self.skip_clubs = True
+        self.corridor = None
+        self.corridor_width = None
 
     def make_graph(self, end, clubs):
         """
@@ -83,53 +141,184 @@ class PathCreator:
             clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
         """
         for curr_v in self.vertices: 
-            num_vertices_added = 0
-            for club, dist in clubs.items():
-                # Skip this club if we were able to add >=3 vertices for a bigger club
-                if num_vertices_added >= 3:
-                    continue
-                num_vertices_added = 0
-                # Can reach pin with this shot
-                if ((end.x-curr_v.x)**2 + (end.y-curr_v.y)**2)**0.5 <= dist:
-                    x = self.end.x
-                    y = self.end.y
-                    h_prox = 0
-                    num_obs = self.get_num_obs(curr_v.x, curr_v.y, x, y)
-                    lie = self.get_lie(curr_v.x, curr_v.y)
-                    new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
-                    curr_v.edges.append(Edge(end, new_weight, club))
-                else:
-                    spacing = 5 # Shots are 5 yards apart
-                    theta = pi/2 # Start by looking for a straight shot
-                    while theta < pi: # Look for shots to the left
-                        x = curr_v.x + dist*cos(theta)
-                        y = curr_v.y + dist*sin(theta)
-                        if self.new_vertex_valid(x,y):
-                            new_v = Vertex(x,y)  
-                            h_prox = self.get_hazard_prox(x,y)
-                            num_obs = self.get_num_obs(curr_v.x, curr_v.y, x, y)
-                            lie = self.get_lie(curr_v.x, curr_v.y)
-                            new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
-                            curr_v.edges.append(Edge(new_v, new_weight, club))
-                            self.vertices.append(new_v)
-                            num_vertices_added += 1
-                        theta += spacing/dist
-                    theta = pi/2
-                    while theta > 0: # Look for shots to the right
-                        x = curr_v.x + dist*cos(theta)
-                        y = curr_v.y + dist*sin(theta)
-                        if self.new_vertex_valid(x,y):
-                            new_v = Vertex(x,y)  
-                            h_prox = self.get_hazard_prox(x,y)
-                            num_obs = self.get_num_obs(curr_v.x, curr_v.y, x, y)
-                            lie = self.get_lie(curr_v.x, curr_v.y)
-                            new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
-                            curr_v.edges.append(Edge(new_v, new_weight, club))
-                            self.vertices.append(new_v)
-                            num_vertices_added += 1
-                        theta -= spacing/dist
+            self.expand_vertex(curr_v, end, clubs)
         self.vertices.append(end)
 
+    def make_graph_parallel(self, end, clubs, processes=None, batch_size=64):
+        """
+        Constructs the same graph as make_graph, expanding the vertices of each level in batches
+        across worker processes (see parallel_graph).
+
+        Args:
+            end (Vertex): The end vertex (pin).
+            clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+            processes (int): The number of worker processes (defaults to the number of CPUs).
+            batch_size (int): The number of vertices sent to a worker at a time.
+        """
+        from parallel_graph import make_graph_parallel
+        make_graph_parallel(self, end, clubs, processes, batch_size)
+
+    def expand_vertex(self, curr_v, end, clubs, partial=False):
+        """
+        Generates the outgoing edges (shots) of a single vertex, adding any new vertices to the graph.
+        A shot is only generated once, so this can be called lazily during the search.
+
+        Args:
+            curr_v (Vertex): The vertex to expand.
+            end (Vertex): The end vertex (pin).
+            clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+            partial (bool): Whether to only generate the shots of the next longest clubs (see get_next_shots).
+
+        Returns:
+            The outgoing edges of the vertex (list of Edge).
+        """
+        if curr_v.expanded or curr_v is end:
+            return curr_v.edges
+        shots, clubs_left = self.get_next_shots(curr_v.x, curr_v.y, end, clubs, curr_v.clubs_left, partial)
+        self.add_shots(curr_v, shots, end, clubs_left)
+        return curr_v.edges
+
+    def add_shots(self, curr_v, shots, end, clubs_left=None):
+        """
+        Adds the shots from a vertex to the graph as its outgoing edges, marking it as expanded
+        unless there are clubs left.
+
+        Args:
+            curr_v (Vertex): The vertex the shots are from.
+            shots (list of tuple): The shots from the vertex, as returned by get_shots.
+            end (Vertex): The end vertex (pin).
+            clubs_left (dict of {club (str):distance (float)}): The clubs whose shots are still to be generated.
+        """
+        curr_v.clubs_left = clubs_left or {}
+        curr_v.expanded = not clubs_left
+        for x, y, weight, club, reaches_pin in shots:
+            if reaches_pin:
+                curr_v.edges.append(Edge(end, weight, club))
+            else:
+                new_v = Vertex(x,y)
+                curr_v.edges.append(Edge(new_v, weight, club))
+                self.vertices.append(new_v)
+
+    def get_shots(self, x1, y1, end, clubs):
+        """
+        Returns the possible shots from a point. This only depends on the terrain, not on the graph,
+        so it can be computed for many points independently.
+
+        Args:
+            x1 (float): The x value of the point.
+            y1 (float): The y value of the point.
+            end (Vertex): The end vertex (pin).
+            clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+
+        Returns:
+            shots (list of (x (float), y (float), weight (float), club (str), reaches_pin (bool)))
+        """
+        shots = []
+        num_vertices_added = 0
+        if self.prune_clubs:
+            clubs = self.get_useful_clubs(x1, y1, end, clubs)
+        for club, dist in clubs.items():
+            # Skip this club if we were able to add >=3 vertices for a bigger club
+            if self.skip_clubs and num_vertices_added >= 3:
+                continue
+            num_vertices_added = 0
+            # Can reach pin with this shot
+            if ((end.x-x1)**2 + (end.y-y1)**2)**0.5 <= dist:
+                x = self.end.x
+                y = self.end.y
+                h_prox = 0
+                num_obs = self.get_num_obs(x1, y1, x, y)
+                lie = self.get_lie(x1, y1)
+                new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
+                shots.append((x, y, new_weight, club, True))
+            else:
+                spacing = self.spacing
+                theta = pi/2 # Start by looking for a straight shot
+                while theta < pi: # Look for shots to the left
+                    x = x1 + dist*cos(theta)
+                    y = y1 + dist*sin(theta)
+                    if self.new_vertex_valid(x,y):
+                        h_prox = self.get_hazard_prox(x,y)
+                        num_obs = self.get_num_obs(x1, y1, x, y)
+                        lie = self.get_lie(x1, y1)
+                        new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
+                        shots.append((x, y, new_weight, club, False))
+                        num_vertices_added += 1
+                    theta += spacing/dist
+                theta = pi/2
+                while theta > 0: # Look for shots to the right
+                    x = x1 + dist*cos(theta)
+                    y = y1 + dist*sin(theta)
+                    if self.new_vertex_valid(x,y):
+                        h_prox = self.get_hazard_prox(x,y)
+                        num_obs = self.get_num_obs(x1, y1, x, y)
+                        lie = self.get_lie(x1, y1)
+                        new_weight = self.calc_weight(lie, self.wind, dist, num_obs, h_prox) 
+                        shots.append((x, y, new_weight, club, False))
+                        num_vertices_added += 1
+                    theta -= spacing/dist
+        return shots
+
+    def get_next_shots(self, x1, y1, end, clubs, clubs_left=None, partial=False):
+        """
+        Returns the shots from a point that haven't been generated yet. If partial and clubs aren't skipped
+        (see skip_clubs), the clubs are tried longest first and only up to the first club with at least 3 shots
+        that land on the course (fewer, longer shots are usually cheaper); the shorter clubs are left for later,
+        so no shot is lost.
+
+        Args:
+            x1 (float): The x value of the point.
+            y1 (float): The y value of the point.
+            end (Vertex): The end vertex (pin).
+            clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+            clubs_left (dict of {club (str):distance (float)}): The clubs not yet tried from the point (None if none have been).
+            partial (bool): Whether to stop after the first club with at least 3 shots.
+
+        Returns:
+            shots (list, see get_shots), clubs left (dict of {club (str):distance (float)})
+        """
+        if clubs_left is None:
+            clubs_left = self.get_useful_clubs(x1, y1, end, clubs) if self.prune_clubs else clubs
+        if self.skip_clubs or not partial: # All at once
+            return self.get_shots(x1, y1, end, clubs_left), {}
+        shots = []
+        clubs_left = dict(clubs_left)
+        for club, dist in list(clubs_left.items()):
+            del clubs_left[club]
+            club_shots = self.get_shots(x1, y1, end, {club: dist})
+            shots.extend(club_shots)
+            if sum(not reaches_pin for *_, reaches_pin in club_shots) >= 3:
+                break
+        return shots, clubs_left
+
+    def get_useful_clubs(self, x1, y1, end, clubs):
+        """
+        Returns the clubs that can still improve the cost to the pin from a point. Every club that
+        reaches the pin only gives a shot to the pin, and the cost of that shot grows with the club
+        distance, so only the shortest of them is kept. The clubs are returned longest first, and as every
+        club that reaches the pin is longer than the others, no club is skipped that wouldn't be otherwise (see skip_clubs).
+
+        Args:
+            x1 (float): The x value of the point.
+            y1 (float): The y value of the point.
+            end (Vertex): The end vertex (pin).
+            clubs (dict of {club (str):distance (float)}): Dictionary of club with their respective distances.
+
+        Returns:
+            clubs (dict of {club (str):distance (float)})
+        """
+        pin_dist = ((end.x-x1)**2 + (end.y-y1)**2)**0.5
+        useful = {}
+        pin_club = None
+        for club, dist in sorted(clubs.items(), key=lambda item: item[1], reverse=True):
+            if dist >= pin_dist:
+                pin_club = (club, dist)
+            else:
+                useful[club] = dist
+        if pin_club is not None:
+            useful = {pin_club[0]: pin_club[1], **useful}
+        return useful
+
     def calc_weight(self, lie, wind, club_dist, num_obs, prox_hazard):
         """
         Returns the weight of an edge (the g score), so the cost of a particular shot.
@@ -141,8 +330,8 @@ class PathCreator:
             num_obs (int): The number of obstacles in the way of the shot.
             prox_hazard (float): The proximity of the landing point to a hazard.
         """
-        lie_weights = {'rough':0.7, 'fairway':0.1, 'bunker':0.95}
-        wind_weights = {'none':0.2, 'moderate':0.5, 'high':0.7}
+        lie_weights = self.lie_weights
+        wind_weights = self.wind_weights
         # Normalizing values
         norm_prox_hazard = prox_hazard/self.course_width
         norm_num_obs = num_obs/10
@@ -157,8 +346,48 @@ class PathCreator:
             x (float): The x value of the new vertex.
             y (float): The y value of the new vertex.
         """
+        if self.corridor is not None and self.get_corridor_dist(x,y) > self.corridor_width:
+            return False
         return y >= 0 and y <= self.course_width and x >=0 and x <= self.course_length and self.get_hazard_prox(x,y)>=1
 
+    def get_corridor_dist(self, x1, y1):
+        """
+        Returns the distance of a point to the corridor polyline.
+
+        Args:
+            x1 (float): The x value of the point.
+            y1 (float): The y value of the point.
+        """
+        curr_min = float('inf')
+        for (xa,ya), (xb,yb) in zip(self.corridor, self.corridor[1:]):
+            seg_len_sq = (xb-xa)**2 + (yb-ya)**2
+            t = ((x1-xa)*(xb-xa) + (y1-ya)*(yb-ya))/seg_len_sq if seg_len_sq > 0 else 0
+            t = min(1, max(0, t))
+            distance = ((x1 - (xa + t*(xb-xa)))**2 + (y1 - (ya + t*(yb-ya)))**2)**0.5
+            if distance < curr_min:
+                curr_min = distance
+        return curr_min
+
+    def make_hazard_index(self, hazards):
+        """
+        Returns a spatial index of the hazards, grouping them by the 1 yard column they are in, sorted by y.
+        This lets the hazard queries only look at the columns and rows that can matter.
+
+        Args:
+            hazards (list of (x (float),y (float))): The hazards on the course.
+
+        Returns:
+            index (dict of {column (int): (ys (list of float), points (list of (x (float),y (float))))})
+        """
+        grouped = {}
+        for (x,y) in hazards:
+            grouped.setdefault(floor(x), []).append((y,x))
+        index = {}
+        for column, points in grouped.items():
+            points.sort()
+            index[column] = ([y for y,_ in points], [(x,y) for y,x in points])
+        return index
+
     def get_hazard_prox(self, x1, y1):
         """
         Returns the proximity of a point to a hazard.
@@ -169,11 +398,32 @@ class PathCreator:
         """
         # curr_min is initially out of bounds by width
         curr_min = min(y1, self.course_width-y1)
-        for (x,y) in self.hazards:
-            distance = ((x1 - x)**2 + (y1 - y)**2)**0.5
-            if distance < curr_min:
-                curr_min = distance
-        return curr_min
+        columns = self.hazard_columns
+        right = bisect_left(columns, floor(x1))
+        left = right - 1
+        # Check columns moving away from the point until they are further than the closest hazard
+        while True:
+            left_open = left >= 0 and x1 - (columns[left]+1) < curr_min
+            right_open = right < len(columns) and columns[right] - x1 < curr_min
+            if not left_open and not right_open:
+                return curr_min
+            for i, is_open in ((left, left_open), (right, right_open)):
+                if not is_open:
+                    continue
+                ys, points = self.hazard_index[columns[i]]
+                mid = bisect_left(ys, y1)
+                j = mid - 1
+                while j >= 0 and y1 - ys[j] < curr_min:
+                    x, y = points[j]
+                    curr_min = min(curr_min, ((x1 - x)**2 + (y1 - y)**2)**0.5)
+                    j -= 1
+                j = mid
+                while j < len(ys) and ys[j] - y1 < curr_min:
+                    x, y = points[j]
+                    curr_min = min(curr_min, ((x1 - x)**2 + (y1 - y)**2)**0.5)
+                    j += 1
+            left -= 1
+            right += 1
 
     def get_num_obs(self, x1, y1, x2, y2):
         """
@@ -185,14 +435,23 @@ class PathCreator:
             x2 (float): The x value of the endpoint.
             y2 (float): The y value of the endpoint.
         """
+        if x2 - x1 == 0: # The line has no finite intercept, so no hazard can be on it
+            return 0
+        slope = (y2-y1)/(x2-x1)
+        intercept = y1 - slope * x1
         count = 0
-        for (x,y) in self.hazards:
-            slope = (y2-y1)/(x2-x1) if (x2 - x1) != 0 else float('inf')
-            intercept = y1 - slope * x1
-            if abs(y - (slope * x + intercept)) <= 1:
-                count+=1
-            if count == 10:
-                break
+        for column in self.hazard_columns:
+            ys, points = self.hazard_index[column]
+            # Only hazards within 1 yard of the line where it crosses this column can count
+            low, high = sorted((slope * column + intercept, slope * (column+1) + intercept))
+            for j in range(bisect_left(ys, low - 1.001), len(ys)):
+                x, y = points[j]
+                if y > high + 1.001:
+                    break
+                if abs(y - (slope * x + intercept)) <= 1:
+                    count+=1
+                    if count == 10:
+                        return count
         return count
 
     def get_lie(self, x, y):
@@ -241,6 +500,466 @@ class PathCreator:
     
         return None  # No path found
 
+    def run_anytime_search(self, time_budget, weight=64.0, weight_factor=0.5, beam_width=None, processes=None, batch_size=None, expander=None):
+        """
+        Runs an anytime (ARA*-style) search for the shortest path within a time budget.
+
+        A weighted A* search quickly finds a feasible path (the heuristic is small next to the shot
+        costs, so the first pass uses a large weight to be close to greedy), then the weight is
+        lowered towards 1 and the search is repaired, tightening the path towards optimal while time remains. Vertices
+        are expanded lazily, so graph construction is bounded by the budget as well. If clubs aren't skipped (see
+        skip_clubs), a vertex first only gets the shots of its longest clubs (see get_next_shots) and is reopened for
+        its other clubs once their lower bound (see get_deferred_bound) comes up, so no shot is lost. If beam_width
+        is given, only the best beam_width open vertices are kept for expansion; the rest are put
+        aside and reconsidered on the next, less greedy, pass. A pass that put vertices aside
+        this way is only bounded by its frontier, not by its weight, so the search goes on at weight 1
+        until the frontier proves the path optimal or the time runs out.
+
+        If processes (or an expander) is given, the best batch_size open vertices are taken at a time and expanded
+        together across worker processes (see parallel_graph.ParallelExpander), which needs the
+        terrain to be on the yard grid. A vertex improved by another vertex of its batch is set aside
+        like any other closed vertex, and a batch the workers can't finish in time is left on the
+        frontier, so the bound still holds.
+
+        Args:
+            time_budget (float): The number of seconds the search may run for.
+            weight (float): The initial heuristic weight (>= 1).
+            weight_factor (float): What the weight is multiplied by after each pass (< 1).
+            beam_width (int): The maximum number of open vertices kept per pass (None for no limit).
+            processes (int): The number of worker processes to expand vertices with (None to expand in this process).
+            batch_size (int): The number of vertices expanded at a time when processes is given (defaults to 4 per process).
+            expander (parallel_graph.ParallelExpander): An expander for this PathCreator to use instead of starting one
+                for processes. It is left open, so it can be reused by later searches.
+
+        Returns:
+            path (list of Vertex), clubs (list of str), bound (float), or None if there is no path.
+            The bound is the proven suboptimality factor of the path (1 is optimal).
+
+        Raises:
+            TimeoutError: If the budget ran out before a path was found.
+        """
+        deadline = time.perf_counter() + time_budget
+        max_club = max(self.clubs.values())
+        self.start.g_score = 0
+        self.end.g_score = float('inf')
+
+        def key(v):
+            k = v.g_score + weight*self.lower_bound_heuristic(v, self.end, max_club)
+            if v.clubs_left: # Partially expanded, so the shots of its other clubs may be due first
+                k = min(k, self.get_deferred_bound(v, weight, max_club))
+            return k
+
+        own_expander = expander is None and processes is not None
+        if own_expander:
+            from parallel_graph import ParallelExpander
+            expander = ParallelExpander(self, self.end, self.clubs, processes)
+        if expander is None:
+            batch_size = 1
+        elif batch_size is None:
+            batch_size = 4*expander.processes
+
+        open_keys = {self.start: key(self.start)} # Vertices to expand and their current key
+        open_set = [(open_keys[self.start], self.start)]
+        set_aside = set() # Improved after being closed, or pruned by the beam
+        result = None
+
+        try:
+            while True:
+                closed = set()
+                out_of_time = False
+                beam_pruned = False # Whether the beam put aside open vertices, which the stop test doesn't see
+                # Improve the path with the current weight
+                while open_set and time.perf_counter() < deadline:
+                    batch = []
+                    while open_set and len(batch) < batch_size:
+                        curr_key, current_vertex = open_set[0]
+                        if open_keys.get(current_vertex) != curr_key: # Stale entry
+                            heapq.heappop(open_set)
+                            continue
+                        if self.end.g_score <= curr_key: # Path is within weight of optimal
+                            break
+                        heapq.heappop(open_set)
+                        del open_keys[current_vertex]
+                        closed.add(current_vertex)
+                        batch.append((current_vertex, curr_key))
+                    if not batch:
+                        break
+                    # Generate the next shots of new vertices, and of vertices whose other clubs are due
+                    to_expand = [v for v, k in batch if v.clubs_left is None or
+                                 (v.clubs_left and self.get_deferred_bound(v, weight, max_club) <= k)]
+                    if expander is not None:
+                        try:
+                            expander.expand(to_expand, timeout=max(0, deadline - time.perf_counter()), partial=True)
+                        except TimeoutError:
+                            set_aside.update(v for v, _ in batch) # Still on the frontier, as they weren't expanded
+                            out_of_time = True
+                            break
+                    else:
+                        for v in to_expand:
+                            self.expand_vertex(v, self.end, self.clubs, partial=True)
+                    for current_vertex, _ in batch:
+                        for edge in current_vertex.edges:
+                            neighbour = edge.end
+                            g_score = current_vertex.g_score + edge.weight
+                            if g_score < neighbour.g_score:
+                                neighbour.g_score = g_score
+                                neighbour.prev = current_vertex  # Update the predecessor
+                                neighbour.club = edge.club # Update the club
+                                if neighbour in closed:
+                                    set_aside.add(neighbour)
+                                else:
+                                    open_keys[neighbour] = key(neighbour)
+                                    heapq.heappush(open_set, (open_keys[neighbour], neighbour))
+                        if current_vertex.clubs_left:
+                            # Reopen the vertex for the shots of its other clubs
+                            closed.discard(current_vertex)
+                            open_keys[current_vertex] = self.get_deferred_bound(current_vertex, weight, max_club)
+                            heapq.heappush(open_set, (open_keys[current_vertex], current_vertex))
+                    if beam_width is not None and len(open_keys) > 2*beam_width:
+                        open_set = sorted((k, v) for v, k in open_keys.items())
+                        for _, v in open_set[beam_width:]:
+                            set_aside.add(v)
+                            del open_keys[v]
+                        open_set = open_set[:beam_width]
+                        beam_pruned = True
+
+                pass_done = not out_of_time and time.perf_counter() < deadline
+                if self.end.g_score < float('inf'):
+                    # Bound the path using the unexpanded frontier
+                    frontier = list(open_keys) + list(set_aside)
+                    lower_bound = min([v.g_score + self.lower_bound_heuristic(v, self.end, max_club) for v in frontier] + [self.end.g_score])
+                    bound = self.end.g_score/lower_bound if lower_bound > 0 else 1
+                    if pass_done and not beam_pruned: # Otherwise only the frontier bounds the path
+                        bound = min(bound, weight)
+                    path, path_clubs = self.reconstruct_path(self.end)
+                    result = path, path_clubs, max(bound, 1)
+                    if result[2] == 1:
+                        return result
+                elif pass_done and not open_keys and not set_aside:
+                    return None # No path exists
+
+                if not pass_done:
+                    if result is None:
+                        raise TimeoutError('No path was found within {} seconds'.format(time_budget))
+                    return result
+
+                # Lower the weight and repair the search with the vertices that were set aside
+                weight = max(1, weight*weight_factor)
+                open_keys = {v: key(v) for v in list(open_keys) + list(set_aside)}
+                set_aside = set()
+                open_set = [(k, v) for v, k in open_keys.items()]
+                heapq.heapify(open_set)
+        finally:
+            if own_expander:
+                expander.close()
+
+    def run_hierarchical_search(self, time_budget, cell_size=10, corridor_width=20, processes=None, batch_size=None):
+        """
+        Runs a coarse-to-fine search for very large holes.
+
+        The hole is first planned on a grid of cell_size yard cells (see make_coarse), then the
+        full resolution search only places vertices inside a corridor of corridor_width yards around
+        the coarse path. The shots are still weighted with all of the hazards, so the costs are the
+        same as in a full search. While the search in the corridor finishes with time to spare (or
+        finds no path), the corridor is doubled in width and searched again, keeping the best path.
+
+        Args:
+            time_budget (float): The number of seconds the search may run for.
+            cell_size (float): The size of a coarse grid cell in yards.
+            corridor_width (float): The initial half width of the corridor around the coarse path in yards.
+            processes (int): The number of worker processes for the full resolution search (see run_anytime_search).
+            batch_size (int): The number of vertices expanded at a time when processes is given (defaults to 4 per process).
+
+        Returns:
+            path (list of Vertex), clubs (list of str), bound (float), or None if there is no path.
+            The bound is relative to the best path within the widest corridor searched.
+
+        Raises:
+            TimeoutError: If the budget ran out before a path was found.
+        """
+        deadline = time.perf_counter() + time_budget
+        try:
+            coarse_result = self.make_coarse(cell_size).run_anytime_search(time_budget/4)
+        except TimeoutError:
+            coarse_result = None
+        if coarse_result is not None:
+            coarse_path = coarse_result[0]
+            self.corridor = [(v.x*cell_size, v.y*cell_size) for v in coarse_path]
+            self.corridor_width = corridor_width
+            max_width = (self.course_width**2 + self.course_length**2)**0.5
+            best = None
+            expander = None
+            try:
+                if processes is not None:
+                    # Started once and shared by every corridor, as the corridor is sent with each batch
+                    from parallel_graph import ParallelExpander
+                    expander = ParallelExpander(self, self.end, self.clubs, processes)
+                while True:
+                    try:
+                        result = self.run_anytime_search(max(0, deadline - time.perf_counter()),
+                                                         batch_size=batch_size, expander=expander)
+                    except TimeoutError:
+                        break
+                    if result is not None and (best is None or self.end.g_score < best_cost):
+                        best, best_cost = result, self.end.g_score
+                    if self.corridor_width >= max_width: # The corridor covers the whole hole
+                        if result is None:
+                            return None
+                        break
+                    if (result is not None and result[2] > 1) or time.perf_counter() >= deadline:
+                        break # Out of time
+                    self.corridor_width *= 2
+                    self.reset_graph()
+            finally:
+                self.corridor = None
+                if expander is not None:
+                    expander.close()
+            if best is None:
+                raise TimeoutError('No path was found within {} seconds'.format(time_budget))
+            # Point the pin back at the best path, in case a later corridor didn't improve on it
+            path, path_clubs, _ = best
+            self.end.g_score = best_cost
+            self.end.prev = path[-2]
+            self.end.club = path_clubs[-1]
+            return best
+        return self.run_anytime_search(max(0, deadline - time.perf_counter()), processes=processes, batch_size=batch_size)
+
+    def run_k_best_search(self, k, max_overlap=None, overlap_radius=10, max_candidates=None, time_budget=None):
+        """
+        Returns the k lowest cost loopless paths from tee to pin over the graph that has already been
+        built (by make_graph or a previous search), using Yen's algorithm. The cost to the pin from every
+        vertex is computed once and reused as an exact heuristic for all of the spur searches.
+        The lowest cost path is always found; if time_budget runs out, the paths found so far are returned.
+
+        Args:
+            k (int): The number of paths to return.
+            max_overlap (float): If given, a path is skipped if more than this fraction of its landing
+                points are within overlap_radius of the landing points of an already returned path.
+            overlap_radius (float): The distance in yards at which two landing points overlap.
+            max_candidates (int): The maximum number of paths to consider (defaults to 20*k).
+            time_budget (float): The number of seconds to look for further paths for (None for no limit).
+
+        Returns:
+            paths (list of (path (list of Vertex), clubs (list of str), cost (float))), sorted by cost.
+        """
+        deadline = time.perf_counter() + time_budget if time_budget is not None else float('inf')
+        if max_candidates is None:
+            max_candidates = 20*k
+        cost_to_go = self.get_cost_to_go()
+        first = self.spur_search(self.start, set(), set(), cost_to_go)
+        if first is None:
+            return []
+        found = [first] # Paths found by Yen's algorithm as (cost, vertices, edges)
+        candidates = []
+        seen = {tuple(first[2])}
+        paths = []
+        while True:
+            cost, vertices, edges = found[-1]
+            landings = vertices[1:-1]
+            if max_overlap is None or all(self.get_landing_overlap(landings, other[0][1:-1], overlap_radius) <= max_overlap for other in paths):
+                paths.append((vertices, [edge.club for edge in edges], cost))
+            if len(paths) == k or len(found) == max_candidates:
+                break
+
+            # Deviate from the last path at each of its vertices
+            for i in range(len(edges)):
+                if time.perf_counter() >= deadline:
+                    return paths # The candidates are incomplete, so the next path may not be the next best
+                root_edges = edges[:i]
+                removed_edges = {p_edges[i] for _, _, p_edges in found if p_edges[:i] == root_edges and len(p_edges) > i}
+                spur = self.spur_search(vertices[i], set(vertices[:i]), removed_edges, cost_to_go)
+                if spur is None:
+                    continue
+                spur_cost, spur_vertices, spur_edges = spur
+                new_edges = root_edges + spur_edges
+                if tuple(new_edges) in seen:
+                    continue
+                seen.add(tuple(new_edges))
+                new_cost = sum(edge.weight for edge in root_edges) + spur_cost
+                heapq.heappush(candidates, (new_cost, len(seen), vertices[:i] + spur_vertices, new_edges))
+            if not candidates:
+                break
+            new_cost, _, new_vertices, new_edges = heapq.heappop(candidates)
+            found.append((new_cost, new_vertices, new_edges))
+        return paths
+
+    def get_cost_to_go(self):
+        """
+        Returns the lowest cost from every vertex of the built graph to the pin (Dijkstra's algorithm on the reversed edges).
+
+        Returns:
+            cost_to_go (dict of {Vertex: float}), vertices that cannot reach the pin are left out.
+        """
+        incoming = {}
+        for v in self.vertices:
+            for edge in v.edges:
+                incoming.setdefault(edge.end, []).append((v, edge.weight))
+        cost_to_go = {}
+        open_set = [(0, 0, self.end)]
+        count = 1 # Breaks ties between equal costs
+        while open_set:
+            cost, _, v = heapq.heappop(open_set)
+            if v in cost_to_go:
+                continue
+            cost_to_go[v] = cost
+            for prev, weight in incoming.get(v, []):
+                if prev not in cost_to_go:
+                    heapq.heappush(open_set, (cost + weight, count, prev))
+                    count += 1
+        return cost_to_go
+
+    def spur_search(self, spur, removed_vertices, removed_edges, cost_to_go):
+        """
+        Runs an A* search from a vertex to the pin that avoids the given vertices and edges,
+        using the cost to go of the full graph as the heuristic.
+
+        Args:
+            spur (Vertex): The vertex to search from.
+            removed_vertices (set of Vertex): The vertices that may not be used.
+            removed_edges (set of Edge): The edges that may not be used.
+            cost_to_go (dict of {Vertex: float}): The cost to the pin of each vertex in the full graph.
+
+        Returns:
+            cost (float), path (list of Vertex), edges (list of Edge), or None if the pin can't be reached.
+        """
+        if spur not in cost_to_go:
+            return None
+        g_scores = {spur: 0}
+        prev_edges = {spur: (None, None)}
+        closed = set()
+        open_set = [(cost_to_go[spur], 0, spur)]
+        count = 1 # Breaks ties between equal costs
+        while open_set:
+            _, _, current_vertex = heapq.heappop(open_set)
+            if current_vertex in closed:
+                continue
+            if current_vertex == self.end:
+                path = []
+                edges = []
+                while current_vertex is not spur:
+                    prev, edge = prev_edges[current_vertex]
+                    path.append(current_vertex)
+                    edges.append(edge)
+                    current_vertex = prev
+                path.append(spur)
+                path.reverse()
+                edges.reverse()
+                return g_scores[self.end], path, edges
+            closed.add(current_vertex)
+            for edge in current_vertex.edges:
+                neighbour = edge.end
+                if edge in removed_edges or neighbour in removed_vertices or neighbour not in cost_to_go:
+                    continue
+                g_score = g_scores[current_vertex] + edge.weight
+                if g_score < g_scores.get(neighbour, float('inf')):
+                    g_scores[neighbour] = g_score
+                    prev_edges[neighbour] = (current_vertex, edge)
+                    heapq.heappush(open_set, (g_score + cost_to_go[neighbour], count, neighbour))
+                    count += 1
+        return None
+
+    def get_landing_overlap(self, landings, other_landings, radius):
+        """
+        Returns the fraction of landing points that are within radius of another path's landing points.
+
+        Args:
+            landings (list of Vertex): The landing points of the path.
+            other_landings (list of Vertex): The landing points of the other path.
+            radius (float): The distance at which two landing points overlap.
+        """
+        if not landings:
+            return 0
+        overlapping = 0
+        for v in landings:
+            if any(((v.x - u.x)**2 + (v.y - u.y)**2)**0.5 <= radius for u in other_landings):
+                overlapping += 1
+        return overlapping/len(landings)
+
+    def make_coarse(self, cell_size):
+        """
+        Returns a PathCreator for the hole downsampled to cells of cell_size yards, in cell units.
+        A cell is a hazard if at least half of it is covered by hazards, and its lie is the most common lie in the cell.
+        Coarse hazards and lies are placed at the centres of their cells, since the coarse vertices are continuous.
+
+        Args:
+            cell_size (float): The size of a cell in yards.
+        """
+        def to_cell(x, y):
+            return floor(x/cell_size), floor(y/cell_size)
+
+        def centre(cell):
+            return cell[0] + 0.5, cell[1] + 0.5
+
+        hazard_counts = Counter(to_cell(x,y) for (x,y) in self.hazards)
+        coarse_hazards = [centre(cell) for cell, count in hazard_counts.items() if count >= cell_size**2/2]
+        lie_counts = {}
+        for lie, points in (('fairway', self.fairway), ('rough', self.rough), ('bunker', self.bunker)):
+            for (x,y) in points:
+                lie_counts.setdefault(to_cell(x,y), Counter())[lie] += 1
+        coarse_lies = {'fairway': [], 'rough': [], 'bunker': []}
+        for cell, counts in lie_counts.items():
+            coarse_lies[counts.most_common(1)[0][0]].append(centre(cell))
+
+        coarse = PathCreator(self.course_width/cell_size, self.course_length/cell_size, coarse_hazards,
+                             Vertex(self.start.x/cell_size, self.start.y/cell_size), Vertex(self.end.x/cell_size, self.end.y/cell_size),
+                             {club: dist/cell_size for club, dist in self.clubs.items()}, self.wind,
+                             coarse_lies['fairway'], coarse_lies['rough'], coarse_lies['bunker'])
+        coarse.spacing = 1 # One shot per cell
+        return coarse
+
+    def reset_graph(self):
+        """Clears the graph built by a previous search so that a new search can be run."""
+        self.vertices = [self.start]
+        self.edges = []
+        for v in (self.start, self.end):
+            v.prev = None
+            v.edges = []
+            v.club = None
+            v.expanded = False
+            v.clubs_left = None
+
+    def lower_bound_heuristic(self, endpoint, pin, max_club):
+        """
+        Calculates an admissible heuristic for an edge (a lower bound on the cost from the endpoint to the pin).
+        Every remaining shot costs at least the best lie weight, and the remaining club distances
+        sum to at least the distance to the pin.
+
+        Args:
+            endpoint (Vertex): The end of the edge.
+            pin (Vertex): The pin.
+            max_club (float): The distance of the longest club.
+
+        Returns:
+            The lower bound on the cost to the pin.
+        """
+        max_dist = (self.course_width**2+self.course_length**2)**0.5
+        dist = ((endpoint.x-pin.x)**2 + (endpoint.y-pin.y)**2)**0.5
+        min_lie = min(self.lie_weights.values())
+        return 0.2*min_lie*ceil(dist/max_club) + 0.2*(dist/max_dist)*self.wind_weights[self.wind]
+
+    def get_deferred_bound(self, vertex, weight, max_club):
+        """
+        Returns a lower bound on the g score plus weight times the heuristic of the ends of the shots
+        of the clubs left at a partially expanded vertex. A shot of distance d costs at least the best
+        lie weight and its wind cost, and lands at least the distance to the pin less d from the pin.
+
+        Args:
+            vertex (Vertex): The partially expanded vertex.
+            weight (float): The heuristic weight.
+            max_club (float): The distance of the longest club.
+        """
+        max_dist = (self.course_width**2+self.course_length**2)**0.5
+        pin_dist = ((vertex.x-self.end.x)**2 + (vertex.y-self.end.y)**2)**0.5
+        min_lie = min(self.lie_weights.values())
+        wind_weight = self.wind_weights[self.wind]
+        bounds = []
+        for dist in vertex.clubs_left.values():
+            dist_left = max(0, pin_dist - dist)
+            shot = 0.2*min_lie + 0.2*(dist/max_dist)*wind_weight
+            rest = 0.2*min_lie*ceil(dist_left/max_club) + 0.2*(dist_left/max_dist)*wind_weight
+            bounds.append(shot + weight*rest)
+        return vertex.g_score + min(bounds)
+
     def heuristic(self, endpoint, pin):
         """
         Calculates the heuristic for an edge (the distance of the endpoint to the pin).
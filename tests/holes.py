@@ -0,0 +1,33 @@
+"""
+Small holes for the tests, with randomly placed hazards and lies on the yard grid.
+"""
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from path_creator import PathCreator, Vertex
+
+def make_hole(seed, corridor=None):
+    """
+    Returns a PathCreator for a small hole with randomly placed hazards and lies on the yard grid.
+
+    Args:
+        seed (int): The seed for placing the hazards and lies.
+        corridor (list of (x (float),y (float))): If given, vertices must lie within 15 yards of this polyline.
+    """
+    rng = random.Random(seed)
+    course_width, course_length = 60, 40
+    start = (20, 2)
+    end = (25, 55)
+    cells = [(x, y) for x in range(course_length) for y in range(course_width)]
+    hazards = set(rng.sample(cells, 700)) - {start, end}
+    fairway = rng.sample(cells, 800)
+    rough = rng.sample(cells, 400)
+    bunker = rng.sample(cells, 120)
+    path_creator = PathCreator(course_width, course_length, sorted(hazards), Vertex(*start), Vertex(*end),
+                               {'PW': 30, 'SW': 20}, 'moderate', fairway, rough, bunker)
+    if corridor is not None:
+        path_creator.corridor = corridor
+        path_creator.corridor_width = 15
+    return path_creator
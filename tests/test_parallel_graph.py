@@ -0,0 +1,52 @@
+"""
+Checks that expanding vertices across worker processes (parallel_graph) builds the same graph and finds
+the same paths as expanding them in this process.
+"""
+import pytest
+
+from holes import make_hole
+from parallel_graph import ParallelExpander
+
+def graph_signature(path_creator):
+    """Returns each vertex of the graph in order, with its outgoing shots."""
+    return [(v.x, v.y, [(e.end.x, e.end.y, e.weight, e.club) for e in v.edges]) for v in path_creator.vertices]
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('corridor', [None, [(20, 2), (8, 30), (25, 55)]])
+def test_make_graph_parallel_matches_make_graph(seed, corridor):
+    serial = make_hole(seed, corridor)
+    serial.make_graph(serial.end, serial.clubs)
+    parallel = make_hole(seed, corridor)
+    parallel.make_graph_parallel(parallel.end, parallel.clubs, processes=2, batch_size=16)
+
+    assert len(serial.vertices) > 20
+    assert graph_signature(parallel) == graph_signature(serial)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_parallel_anytime_search_finds_optimal_path(seed):
+    serial = make_hole(seed)
+    serial_result = serial.run_anytime_search(60)
+    parallel = make_hole(seed)
+    parallel_result = parallel.run_anytime_search(60, processes=2, batch_size=16)
+
+    assert serial_result is not None and parallel_result is not None
+    assert serial_result[2] == parallel_result[2] == 1
+    assert parallel.end.g_score == pytest.approx(serial.end.g_score)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_expander_is_shared_across_corridors(seed):
+    # The corridor is sent with each batch, so the workers follow the corridor of the current search
+    corridors = [[(20, 2), (8, 30), (25, 55)], [(20, 2), (32, 30), (25, 55)]]
+    parallel = make_hole(seed)
+    with ParallelExpander(parallel, parallel.end, parallel.clubs, processes=2) as expander:
+        for corridor in corridors:
+            serial = make_hole(seed, corridor)
+            serial_result = serial.run_anytime_search(60)
+            parallel.reset_graph()
+            parallel.corridor = corridor
+            parallel.corridor_width = 15
+            parallel_result = parallel.run_anytime_search(60, batch_size=16, expander=expander)
+
+            assert all(parallel.get_corridor_dist(v.x, v.y) <= 15 for v in parallel.vertices[1:])
+            assert (parallel_result is None) == (serial_result is None)
+            assert parallel.end.g_score == pytest.approx(serial.end.g_score)
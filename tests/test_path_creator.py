@@ -0,0 +1,62 @@
+"""
+Checks the searches of PathCreator against the optimal paths of the same holes.
+"""
+import time
+
+import pytest
+
+from holes import make_hole
+
+@pytest.mark.parametrize('seed', [3, 4])
+@pytest.mark.parametrize('beam_width', [1, 2, 5])
+def test_beam_search_bound_holds(seed, beam_width):
+    # The beam puts vertices aside that the weighted stop test doesn't see, so the bound must come from the frontier
+    optimal = make_hole(seed)
+    assert optimal.run_anytime_search(60, weight=1)[2] == 1
+    beam = make_hole(seed)
+    result = beam.run_anytime_search(60, beam_width=beam_width)
+
+    assert result is not None
+    assert beam.end.g_score <= result[2]*optimal.end.g_score*(1 + 1e-9)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('skip_clubs', [True, False])
+def test_pruned_clubs_keep_optimal_path(seed, skip_clubs):
+    full = make_hole(seed)
+    full.prune_clubs = False
+    full.skip_clubs = skip_clubs
+    full.make_graph(full.end, full.clubs)
+    pruned = make_hole(seed)
+    pruned.skip_clubs = skip_clubs
+    pruned.make_graph(pruned.end, pruned.clubs)
+
+    assert sum(len(v.edges) for v in pruned.vertices) < sum(len(v.edges) for v in full.vertices)
+    assert pruned.run_k_best_search(1)[0][2] == pytest.approx(full.run_k_best_search(1)[0][2])
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_deferred_clubs_search_matches_full_graph(seed):
+    # Without the club skip, the search only generates the shots of shorter clubs when they could still improve the path
+    searched = make_hole(seed)
+    searched.skip_clubs = False
+    result = searched.run_anytime_search(60)
+    full = make_hole(seed)
+    full.skip_clubs = False
+    full.make_graph(full.end, full.clubs)
+    best = full.run_k_best_search(1)
+
+    assert result is not None and result[2] == 1
+    assert searched.end.g_score == pytest.approx(best[0][2])
+    assert len(searched.vertices) < len(full.vertices)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_hierarchical_search_stops_at_whole_hole(seed):
+    # Once the corridor covers the hole, the search is the full search and widening it can't help
+    optimal = make_hole(seed)
+    optimal.run_anytime_search(60, weight=1)
+    hierarchical = make_hole(seed)
+    start = time.perf_counter()
+    result = hierarchical.run_hierarchical_search(60, cell_size=5, corridor_width=5)
+
+    assert time.perf_counter() - start < 30
+    assert result is not None
+    assert hierarchical.end.g_score == pytest.approx(optimal.end.g_score)